@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from functools import lru_cache
+from functools import lru_cache, cached_property
 from urllib.parse import quote_plus
 
 class Settings(BaseSettings):
@@ -20,10 +20,16 @@ class Settings(BaseSettings):
     redis_port: int = 6379
     redis_db: int = 0
     redis_ttl: int = 86400  # 24 hours
+    click_flush_interval: int = 10  # seconds
+
+    # In-process cache
+    local_cache_size: int = 10000
+    local_cache_ttl: int = 30  # seconds
 
     # Rate Limiting
     rate_limit_requests: int = 100
     rate_limit_window: int = 60  # seconds
+    trust_forwarded_for: bool = False  # only enable behind a trusted reverse proxy
 
     # URL Settings
     short_code_length: int = 10
@@ -36,12 +42,13 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = False
 
-    @property
+    # Built once per Settings instance; pydantic v2 leaves cached_property alone
+    @cached_property
     def database_url(self) -> str:
         encoded_password = quote_plus(self.postgres_password)
         return f"postgresql://{self.postgres_user}:{encoded_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
 
-    @property
+    @cached_property
     def redis_url(self) -> str:
         return f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db}"
 
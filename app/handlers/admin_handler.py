@@ -1,4 +1,7 @@
+import hmac
+
 from fastapi import APIRouter, Depends, HTTPException, Header
+from datetime import datetime
 from typing import Optional
 
 from ..schemas.url_schema import URLListResponse, AnalyticsResponse
@@ -6,6 +9,7 @@ from ..services.url_service import url_service
 from ..config import get_settings
 
 settings = get_settings()
+_ADMIN_TOKEN = settings.admin_token.encode()
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
 def verify_admin_token(authorization: Optional[str] = Header(None)):
@@ -13,23 +17,30 @@ def verify_admin_token(authorization: Optional[str] = Header(None)):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing authorization header")
 
-    token = authorization.replace("Bearer ", "")
-    if token != settings.admin_token:
+    token = authorization[7:]
+    # Constant-time compare so the token can't be recovered by timing
+    if not hmac.compare_digest(token.encode(), _ADMIN_TOKEN):
         raise HTTPException(status_code=403, detail="Invalid admin token")
 
     return token
 
 @router.get("/urls", response_model=URLListResponse)
 async def list_urls(
-        page: int = 1,
         page_size: int = 20,
+        after_created_at: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+        approx: bool = False,
         token: str = Depends(verify_admin_token)
 ):
-    """List all URLs with pagination (admin only)"""
-    if page < 1 or page_size < 1 or page_size > 100:
+    """List all URLs with cursor pagination (admin only)"""
+    if page_size < 1 or page_size > 100:
         raise HTTPException(status_code=400, detail="Invalid pagination parameters")
 
-    return await url_service.list_urls(page, page_size)
+    if (after_created_at is None) != (after_id is None):
+        raise HTTPException(status_code=400, detail="Cursor requires both after_created_at and after_id")
+
+    cursor = (after_created_at, after_id) if after_created_at is not None else None
+    return await url_service.list_urls(cursor, page_size, approx)
 
 @router.get("/analytics", response_model=AnalyticsResponse)
 async def get_analytics(token: str = Depends(verify_admin_token)):
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Request, Query
+from fastapi import APIRouter, Depends, Request, Query
 from fastapi.responses import RedirectResponse
 from typing import Annotated
 
@@ -18,16 +18,28 @@ rate_limiter = RateLimiter(
 )
 
 
+async def get_client_ip(request: Request) -> str:
+    """Resolve the client IP once per request and stash it on request.state"""
+    client_ip = getattr(request.state, "client_ip", None)
+    if client_ip is None:
+        forwarded = request.headers.get("x-forwarded-for") if settings.trust_forwarded_for else None
+        if forwarded:
+            # Left-most entry is the original client
+            client_ip = forwarded.split(",", 1)[0].strip()
+        else:
+            client_ip = request.client.host
+        request.state.client_ip = client_ip
+
+    return client_ip
+
+
 @router.post("/api/shorten", response_model=URLResponse, status_code=201)
 async def create_short_url(
         url_data: Annotated[URLCreate, Query()],  # Changed to Query parameter,
-        request: Request):
+        client_ip: Annotated[str, Depends(get_client_ip)]):
     """Create a shortened URL"""
     # Check rate limit
-    await rate_limiter.check_rate_limit(request)
-
-    # Get client IP
-    client_ip = request.client.host
+    await rate_limiter.check_rate_limit(client_ip)
 
     # Create short URL
     result = await url_service.create_short_url(
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
@@ -15,6 +16,8 @@ async def lifespan(app: FastAPI):
     # Startup
     await url_repository.create_tables()
     print("✓ Database tables created")
+    url_service.start_click_flusher()
+    print("✓ Click flusher started")
     print(f"✓ Application started: {settings.app_name}")
 
     yield
@@ -26,7 +29,8 @@ async def lifespan(app: FastAPI):
 app = FastAPI(
     title=settings.app_name,
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
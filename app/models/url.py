@@ -1,19 +1,27 @@
 from sqlalchemy import Column, String, Integer, DateTime, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 Base = declarative_base()
 
 class URL(Base):
     __tablename__ = "urls"
 
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    short_code = Column(String(10), unique=True, nullable=False, index=True)
-    original_url = Column(String(2048),  nullable=False, unique=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    short_code = Column(String(10), nullable=False)
+    original_url = Column(String(2048), nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     click_count = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     last_accessed_at = Column(DateTime(timezone=True), nullable=True)
     created_by_ip = Column(String(45), nullable=True)
 
+    __table_args__ = (
+        # Uniqueness only among active rows; also serves every active lookup
+        Index("uq_active_short_code", "short_code", unique=True, postgresql_where=text("is_active")),
+        Index("uq_active_original_url", "original_url", unique=True, postgresql_where=text("is_active")),
+        # Serves keyset pagination ordered by (created_at, id)
+        Index("idx_created_at_id", "created_at", "id"),
+    )
+
 
@@ -1,23 +1,67 @@
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy import select, update, func, and_
+from sqlalchemy.engine import make_url
+from sqlalchemy import select, insert, update, values, column, bindparam, func, and_, text, tuple_
+from sqlalchemy import String, Integer, DateTime, RowMapping
 from datetime import datetime
 from typing import Optional, Any, Sequence
 
 from ..models.url import URL, Base
+from ..utils.base62 import generate_short_code
 from ..config import get_settings
 
 settings = get_settings()
 
+# Hot-path statements built once at import; values are bound per call
+_STMT_BY_SHORT_CODE = select(URL).where(
+    and_(URL.short_code == bindparam("short_code"), URL.is_active == True)
+)
+
+_STMT_BY_ORIGINAL_URL = select(URL).where(
+    and_(URL.original_url == bindparam("original_url"), URL.is_active == True)
+)
+
+# Plain columns, not ORM entities: listing rows are read-only
+_STMT_PAGE = (
+    select(
+        URL.id,
+        URL.short_code,
+        URL.original_url,
+        URL.created_at,
+        URL.last_accessed_at,
+        URL.click_count,
+        URL.is_active
+    )
+    .order_by(URL.created_at.desc(), URL.id.desc())
+    .limit(bindparam("page_size"))
+)
+
+_STMT_PAGE_AFTER = _STMT_PAGE.where(
+    tuple_(URL.created_at, URL.id) < tuple_(
+        bindparam("after_created_at", type_=DateTime(timezone=True)),
+        bindparam("after_id", type_=Integer)
+    )
+)
+
 class URLRepository:
     def __init__(self):
         # print("settings.database_url :",settings.database_url)
         self.engine = create_async_engine(
-            settings.database_url.replace('postgresql://', 'postgresql+asyncpg://'),
+            # SQLAlchemy's own per-connection prepared statement LRU
+            make_url(settings.database_url)
+            .set(drivername="postgresql+asyncpg")
+            .update_query_dict({"prepared_statement_cache_size": "1024"}),
             pool_size=20,
             max_overflow=40,
             pool_pre_ping=True,
             pool_recycle=3600,
+            # Reuse the most recently returned connection so its statement cache stays warm
+            pool_use_lifo=True,
+            connect_args={
+                "statement_cache_size": 1024,
+                # JIT warmup costs more than it saves on these tiny OLTP queries
+                "server_settings": {"jit": "off"}
+            },
             echo=False
         )
         self.async_session = async_sessionmaker(
@@ -35,43 +79,40 @@ class URLRepository:
     async def get_by_short_code(self, short_code: str) -> Optional[URL]:
         """Retrieve URL by short code"""
         async with self.async_session() as session:
-            result = await session.execute(
-                select(URL).where(
-                    and_(URL.short_code == short_code, URL.is_active == True)
-                )
-            )
+            result = await session.execute(_STMT_BY_SHORT_CODE, {"short_code": short_code})
             return result.scalar_one_or_none()
 
 
     async def get_by_original_url(self, original_url: str) -> Optional[URL]:
         """Check if original URL already exists"""
         async with self.async_session() as session:
-            result = await session.execute(
-                select(URL).where(
-                    and_(URL.original_url == original_url, URL.is_active == True)
-                )
-            )
+            result = await session.execute(_STMT_BY_ORIGINAL_URL, {"original_url": original_url})
             return result.scalar_one_or_none()
 
 
     async def create_url(self, original_url: str, custom_alias: Optional[str], ip: str) -> URL:
         """Create new URL mapping - raises IntegrityError on conflict"""
         async with self.async_session() as session:
-            short_code = "temp"
+            row = {
+                "original_url": original_url,
+                "created_by_ip": ip
+            }
+
             if custom_alias:
-                short_code = custom_alias
+                row["short_code"] = custom_alias
+            else:
+                # Reserve the ID up front so the final short_code goes in with the row
+                xid = (await session.execute(select(func.nextval("urls_id_seq")))).scalar()
+                row["id"] = xid
+                row["short_code"] = generate_short_code(original_url, xid, settings.short_code_length)
 
-            url = URL(
-                short_code=short_code,
-                original_url=original_url,
-                created_by_ip=ip
-            )
+            # INSERT ... RETURNING hydrates the row in the same round-trip
+            stmt = insert(URL).values(**row).returning(URL)
 
             try:
-                session.add(url)
-                await session.flush()
+                result = await session.scalars(stmt)
+                url = result.one()
                 await session.commit()
-                await session.refresh(url)
                 return url
             except IntegrityError as e:
                 # Rollback the failed transaction
@@ -79,87 +120,94 @@ class URLRepository:
                 # Re-raise to be handled by service layer
                 raise e
 
+    async def bulk_increment_click_counts(self, clicks: dict[str, int]) -> None:
+        """Apply buffered click counts in one UPDATE, stamping access time server-side"""
+        if not clicks:
+            return
 
-    async def update_short_code(self, url_id: int, short_code: str) -> URL:
-        """Update short_code after generation"""
-        async with self.async_session() as session:
-            try:
-                # Fetch the URL entry
-                result = await session.execute(
-                    select(URL).where(URL.id == url_id)
-                )
-                url = result.scalar_one_or_none()
-
-                if not url:
-                    raise ValueError(f"URL with id {url_id} not found")
-
-                # Update the short_code
-                url.short_code = short_code
-
-                await session.commit()
-                await session.refresh(url)
-                return url
-            except IntegrityError as e:
-                # If short_code conflicts with existing one
-                await session.rollback()
-                raise e
+        batch = (
+            values(
+                column("short_code", String),
+                column("clicks", Integer),
+                name="batch"
+            )
+            .data(list(clicks.items()))
+        )
 
-    async def increment_click_count(self, short_code: str) -> None:
-        """Increment click count and update last accessed time"""
         async with self.async_session() as session:
+            # UPDATE ... FROM (VALUES ...) joins the whole batch against urls
             await session.execute(
                 update(URL)
-                .where(URL.short_code == short_code)
+                .where(and_(URL.short_code == batch.c.short_code, URL.is_active == True))
                 .values(
-                    click_count=URL.click_count + 1,
-                    last_accessed_at=datetime.now()
+                    click_count=URL.click_count + batch.c.clicks,
+                    last_accessed_at=func.now()
                 )
             )
             await session.commit()
 
-    async def get_paginated_urls(self, page: int, page_size: int) -> tuple[Sequence[URL], Optional[Any]]:
-        """Get paginated list of URLs"""
+    async def get_paginated_urls(
+            self,
+            cursor: Optional[tuple[datetime, int]],
+            page_size: int,
+            approx: bool = False
+    ) -> tuple[Sequence[RowMapping], Optional[Any], Optional[tuple[datetime, int]]]:
+        """Get a page of URLs using keyset pagination on (created_at, id)"""
         async with self.async_session() as session:
-            # Get total count
-            count_result = await session.execute(select(func.count(URL.id)))
-            total = count_result.scalar()
+            # Get total count (kept separate from the ordered data query)
+            total = None
+            if approx:
+                # Planner estimate - avoids a full scan on large tables
+                estimate = await session.execute(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+                    {"table": URL.__tablename__}
+                )
+                total = estimate.scalar()
+            if total is None or total < 0:
+                # Table never analyzed (or exact count requested)
+                count_result = await session.execute(select(func.count()).select_from(URL))
+                total = count_result.scalar()
+
+            # Seek past the cursor instead of OFFSET so deep pages stay cheap
+            if cursor:
+                result = await session.execute(
+                    _STMT_PAGE_AFTER,
+                    {"page_size": page_size, "after_created_at": cursor[0], "after_id": cursor[1]}
+                )
+            else:
+                result = await session.execute(_STMT_PAGE, {"page_size": page_size})
+            urls = result.mappings().all()
 
-            # Get paginated results
-            result = await session.execute(
-                select(URL)
-                .order_by(URL.created_at.desc())
-                .offset((page - 1) * page_size)
-                .limit(page_size)
-            )
-            urls = result.scalars().all()
-            return urls, total
+            # A short page means there is nothing left to fetch
+            next_cursor = None
+            if len(urls) == page_size:
+                next_cursor = (urls[-1]["created_at"], urls[-1]["id"])
+
+            return urls, total, next_cursor
 
     async def get_analytics(self) -> dict:
         """Get analytics data"""
         async with self.async_session() as session:
-            # Total URLs
-            total_urls = await session.execute(select(func.count(URL.id)))
-
-            # Total clicks
-            total_clicks = await session.execute(select(func.sum(URL.click_count)))
-
-            # Active URLs
-            active_urls = await session.execute(
-                select(func.count(URL.id)).where(URL.is_active)
-            )
-
-            # Clicks today
             today = datetime.now().date()
-            clicks_today = await session.execute(
-                select(func.sum(URL.click_count))
-                .where(URL.last_accessed_at >= today)
+
+            # One pass over the table using FILTER aggregates
+            result = await session.execute(
+                select(
+                    func.count(URL.id),
+                    func.coalesce(func.sum(URL.click_count), 0),
+                    func.count(URL.id).filter(URL.is_active),
+                    func.coalesce(
+                        func.sum(URL.click_count).filter(URL.last_accessed_at >= today), 0
+                    )
+                )
             )
+            total_urls, total_clicks, active_urls, clicks_today = result.one()
 
             return {
-                "total_urls": total_urls.scalar() or 0,
-                "total_clicks": total_clicks.scalar() or 0,
-                "active_urls": active_urls.scalar() or 0,
-                "clicks_today": clicks_today.scalar() or 0
+                "total_urls": total_urls or 0,
+                "total_clicks": total_clicks or 0,
+                "active_urls": active_urls or 0,
+                "clicks_today": clicks_today or 0
             }
 
     async def delete_url(self, short_code: str) -> bool:
@@ -167,7 +215,7 @@ class URLRepository:
         async with self.async_session() as session:
             result = await session.execute(
                 update(URL)
-                .where(URL.short_code == short_code)
+                .where(and_(URL.short_code == short_code, URL.is_active == True))
                 .values(is_active=False)
             )
             await session.commit()
@@ -23,10 +23,14 @@ class URLInfo(URLResponse):
     class Config:
         from_attributes = True
 
+class URLCursor(BaseModel):
+    created_at: datetime
+    id: int
+
 class URLListResponse(BaseModel):
     total: int
-    page: int
     page_size: int
+    next_cursor: Optional[URLCursor]
     urls: list[URLInfo]
 
 class AnalyticsResponse(BaseModel):
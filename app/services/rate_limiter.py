@@ -1,33 +1,87 @@
+import zlib
+
 import redis.asyncio as aioredis
-from fastapi import Request, HTTPException
+from fastapi import HTTPException
+
+# Token bucket: refill by elapsed time, then try to consume one token.
+# IPs are spread across a fixed number of small hashes (field = IP,
+# value = "tokens:ts") so Redis can keep them in compact listpack encoding
+# instead of paying per-key overhead for every client.
+#
+# Each bucket hash is split into generations of one window. A bucket refills
+# completely within one window, so state older than the previous generation
+# is equivalent to a full bucket and can simply expire with its hash.
+# The clock is Redis' own so every app worker shares the same time source.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local window_ms = tonumber(ARGV[3])
+local ip = ARGV[4]
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local gen = math.floor(now / window_ms)
+local current = KEYS[1] .. ':' .. gen
+local previous = KEYS[1] .. ':' .. (gen - 1)
+
+local state = redis.call('HGET', current, ip)
+if not state then
+    state = redis.call('HGET', previous, ip)
+end
+
+local tokens = burst
+local ts = now
+if state then
+    local sep = string.find(state, ':', 1, true)
+    tokens = tonumber(string.sub(state, 1, sep - 1))
+    ts = tonumber(string.sub(state, sep + 1))
+end
+
+local delta = math.max(0, now - ts) * rate
+tokens = math.min(burst, tokens + delta)
+
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+
+redis.call('HSET', current, ip, tostring(tokens) .. ':' .. now)
+if redis.call('TTL', current) < 0 then
+    redis.call('PEXPIRE', current, window_ms * 2)
+end
+return allowed
+"""
 
 class RateLimiter:
-    def __init__(self, redis_url: str, limit: int, window: int):
+    def __init__(self, redis_url: str, limit: int, window: int, buckets: int = 1024):
         self.redis = aioredis.from_url(redis_url, decode_responses=True)
         self.limit = limit
         self.window = window
+        self.buckets = buckets
+        # Tokens per millisecond and bucket capacity
+        self.rate = limit / (window * 1000)
+        self.burst = limit
+        self._script = self.redis.register_script(_TOKEN_BUCKET_SCRIPT)
 
-    async def check_rate_limit(self, request: Request) -> None:
-        """Check if request exceeds rate limit"""
-        # Get client IP
-        client_ip = request.client.host
-        key = f"rate_limit:{client_ip}"
+    async def check_rate_limit(self, client_ip: str) -> None:
+        """Check if the client IP exceeds rate limit"""
+        # Hash tag keeps every generation of a bucket in the same cluster slot
+        bucket = zlib.crc32(client_ip.encode()) % self.buckets
+        key = b"rl:{%d}" % bucket
 
-        # Get current count
-        current = await self.redis.get(key)
+        # Single round-trip: refill and consume atomically
+        allowed = await self._script(
+            keys=[key],
+            args=[self.rate, self.burst, self.window * 1000, client_ip]
+        )
 
-        if current is None:
-            # First request in window
-            await self.redis.setex(key, self.window, 1)
-        elif int(current) >= self.limit:
+        if not int(allowed):
             # Rate limit exceeded
             raise HTTPException(
                 status_code=429,
                 detail=f"Rate limit exceeded. Max {self.limit} requests per {self.window} seconds."
             )
-        else:
-            # Increment counter
-            await self.redis.incr(key)
 
     async def close(self):
         """Close Redis connection"""
@@ -1,23 +1,34 @@
 import asyncio
 
 import redis.asyncio as aioredis
+from cachetools import TTLCache
 from fastapi import HTTPException
+from datetime import datetime
 from typing import Optional
 
 from sqlalchemy.exc import IntegrityError
 
 from ..repositories.url_repository import url_repository
-from ..utils.base62 import generate_short_code
 from ..config import get_settings
 
 settings = get_settings()
 
+# Redis hash buffering clicks between DB flushes (short_code -> count)
+_CLICKS_KEY = b"clicks"
+# Upper bound on fire-and-forget click writes in flight
+_MAX_PENDING_CLICKS = 1000
+
+
+# Prefix for public short URLs, built once
+_SHORT_URL_PREFIX = f"{settings.base_url}/"
+
 
 def _format_response(url) -> dict:
     """Format URL response"""
+    short_code = url.short_code
     return {
-        "short_code": url.short_code,
-        "short_url": f"{settings.base_url}/{url.short_code}",
+        "short_code": short_code,
+        "short_url": _SHORT_URL_PREFIX + short_code,
         "original_url": url.original_url,
         "created_at": url.created_at,
         "last_accessed_at": url.last_accessed_at,
@@ -27,17 +38,25 @@ def _format_response(url) -> dict:
 
 
 class URLService:
+    # Redis keys are built as bytes to skip redis-py's str encoding per call
+    _KEY_PREFIX = b"url:"
+
     def __init__(self):
         self.repository = url_repository
         self.redis = aioredis.from_url(settings.redis_url, decode_responses=False)
         self.cache_ttl = settings.redis_ttl
+        # Process-local cache for hot codes, in front of Redis
+        self._local: TTLCache = TTLCache(maxsize=settings.local_cache_size, ttl=settings.local_cache_ttl)
+        self.click_flush_interval = settings.click_flush_interval
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_stop = asyncio.Event()
+        self._pending_clicks: set[asyncio.Task] = set()
 
     async def create_short_url(self, original_url: str, custom_alias: Optional[str], ip: str) -> dict:
         """Create shortened URL with idempotency"""
         # Check if URL already exists (idempotency)
-        # Check if URL already exists (idempotency - first check)
         existing = await self.repository.get_by_original_url(original_url)
-        if existing and existing.short_code != "temp":
+        if existing:
             return _format_response(existing)
 
         # Check custom alias availability
@@ -47,59 +66,46 @@ class URLService:
                 raise HTTPException(status_code=400, detail="Custom alias already taken")
 
         try:
-            # Create URL entry with temp short_code
+            # Single INSERT with the final short_code
             url = await self.repository.create_url(original_url, custom_alias, ip)
+        except IntegrityError:
+            # Race condition occurred - another request created this URL first.
+            # Rows are committed with their final short_code, so one lookup is enough.
+            existing = await self.repository.get_by_original_url(original_url)
+            if existing:
+                await self._cache_url(existing.short_code, original_url)
+                return _format_response(existing)
 
             if custom_alias:
-                url.short_code = custom_alias
-            else:
-                # Generate short code using ID
-                url.short_code = generate_short_code(original_url, url.id, settings.short_code_length)
-
-            # Update with actual short_code
-            url = await self.repository.update_short_code(url.id, url.short_code)
-
-            # Cache the mapping
-            await self._cache_url(url.short_code, original_url)
-
-            return _format_response(url)
+                raise HTTPException(status_code=400, detail="Custom alias already taken")
 
-        except IntegrityError:
-            # Race condition occurred - another request created this URL
-            # Retry with exponential backoff (10ms base delay, 3 retries)
-            max_retries = 3
-            delay_ms = 10  # 10 milliseconds base delay
-
-            for attempt in range(max_retries):
-                # Retrieve the existing entry from database
-                existing = await self.repository.get_by_original_url(original_url)
-
-                if existing and existing.short_code != "temp":
-                    # Valid entry exists, cache and return it
-                    await self._cache_url(existing.short_code, original_url)
-                    return _format_response(existing)
-
-                # If not the last attempt, wait before retry
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(delay_ms / 1000)  # Convert ms to seconds
-                    delay_ms *= 2  # Exponential backoff: 10ms, 20ms, 40ms
-
-            # All retries exhausted, entry still has temp short_code
             raise HTTPException(
                 status_code=500,
                 detail="Failed to create short URL due to race condition"
             )
 
+        # Cache the mapping
+        await self._cache_url(url.short_code, original_url)
+
+        return _format_response(url)
 
     async def get_original_url(self, short_code: str) -> str:
         """Get original URL with caching for <10ms response"""
-        # Try cache first (sub-millisecond lookup)
-        cached = await self.redis.get(f"url:{short_code}")
+        # Try in-process cache first (no network hop)
+        local = self._local.get(short_code)
+        if local is not None:
+            await self._track_click(short_code)
+            return local
+
+        # Then Redis (sub-millisecond lookup)
+        cached = await self.redis.get(self._KEY_PREFIX + short_code.encode())
 
         if cached:
-            # Cache hit - increment async (don't wait)
-            await self.repository.increment_click_count(short_code)
-            return cached.decode('utf-8')
+            # Cache hit - buffer the click in Redis without waiting on it
+            await self._track_click(short_code)
+            original_url = cached.decode('utf-8')
+            self._local[short_code] = original_url
+            return original_url
 
         # Cache miss - query database
         url = await self.repository.get_by_short_code(short_code)
@@ -109,9 +115,10 @@ class URLService:
 
         # Update cache for future requests
         await self._cache_url(short_code, url.original_url)
+        self._local[short_code] = url.original_url
 
         # Increment click count
-        await self.repository.increment_click_count(short_code)
+        await self._track_click(short_code)
 
         return url.original_url
 
@@ -124,14 +131,15 @@ class URLService:
 
         return url
 
-    async def list_urls(self, page: int, page_size: int) -> dict:
-        """List URLs with pagination"""
-        urls, total = await self.repository.get_paginated_urls(page, page_size)
-        urls = [_format_response(url) for url in urls]
+    async def list_urls(self, cursor: Optional[tuple[datetime, int]], page_size: int, approx: bool = False) -> dict:
+        """List URLs with keyset pagination"""
+        urls, total, next_cursor = await self.repository.get_paginated_urls(cursor, page_size, approx)
+        # Rows are already dict-like; only short_url needs adding
+        urls = [{**url, "short_url": _SHORT_URL_PREFIX + url["short_code"]} for url in urls]
         return {
             "total": total,
-            "page": page,
             "page_size": page_size,
+            "next_cursor": {"created_at": next_cursor[0], "id": next_cursor[1]} if next_cursor else None,
             "urls": urls
         }
 
@@ -142,7 +150,8 @@ class URLService:
     async def delete_url(self, short_code: str) -> bool:
         """Delete URL"""
         # Remove from cache
-        await self.redis.delete(f"url:{short_code}")
+        self._local.pop(short_code, None)
+        await self.redis.delete(self._KEY_PREFIX + short_code.encode())
 
         # Soft delete from database
         return await self.repository.delete_url(short_code)
@@ -150,14 +159,94 @@ class URLService:
     async def _cache_url(self, short_code: str, original_url: str) -> None:
         """Cache URL mapping with TTL"""
         await self.redis.setex(
-            f"url:{short_code}",
+            self._KEY_PREFIX + short_code.encode(),
             self.cache_ttl,
             original_url
         )
 
+    async def _record_click(self, short_code: str) -> None:
+        """Buffer a click in Redis"""
+        await self.redis.hincrby(_CLICKS_KEY, short_code, 1)
+
+    async def _track_click(self, short_code: str) -> None:
+        """Record a click off the request path, inline only when backlogged"""
+        if len(self._pending_clicks) >= _MAX_PENDING_CLICKS:
+            # Too many in flight - apply backpressure instead of piling up tasks
+            await self._record_click(short_code)
+            return
+
+        task = asyncio.create_task(self._record_click(short_code))
+        # Hold a reference so the task isn't garbage collected mid-flight
+        self._pending_clicks.add(task)
+        task.add_done_callback(self._on_click_done)
+
+    def _on_click_done(self, task: asyncio.Task) -> None:
+        """Drop a finished click task and surface its failure, if any"""
+        self._pending_clicks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"✗ Click tracking failed: {task.exception()}")
+
+    async def flush_click_counts(self) -> None:
+        """Drain buffered clicks from Redis and write them to the database"""
+        # MULTI/EXEC so clicks recorded during the drain aren't lost
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hgetall(_CLICKS_KEY)
+        pipe.delete(_CLICKS_KEY)
+        counts, _ = await pipe.execute()
+
+        if not counts:
+            return
+
+        clicks = {code.decode('utf-8'): int(count) for code, count in counts.items()}
+        try:
+            await self.repository.bulk_increment_click_counts(clicks)
+        except BaseException:
+            # Put the drained counts back so the next flush retries them,
+            # including when the write is cancelled mid-flight
+            pipe = self.redis.pipeline(transaction=False)
+            for code, count in clicks.items():
+                pipe.hincrby(_CLICKS_KEY, code, count)
+            await pipe.execute()
+            raise
+
+    async def _click_flush_loop(self) -> None:
+        """Periodically flush buffered clicks until asked to stop"""
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_stop.wait(), self.click_flush_interval)
+                break
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush_click_counts()
+            except Exception as e:
+                print(f"✗ Click flush failed: {e}")
+
+    def start_click_flusher(self) -> None:
+        """Start the background click flush task"""
+        if self._flush_task is None:
+            self._flush_stop.clear()
+            self._flush_task = asyncio.create_task(self._click_flush_loop())
+
     async def close(self):
         """Close connections"""
-        await self.redis.close()
+        if self._flush_task is not None:
+            # Signal rather than cancel so a flush already in progress finishes
+            self._flush_stop.set()
+            await self._flush_task
+            self._flush_task = None
+
+        # Let in-flight click writes land before the final flush
+        if self._pending_clicks:
+            await asyncio.gather(*self._pending_clicks, return_exceptions=True)
+
+        # Write out whatever is still buffered before shutting down
+        try:
+            await self.flush_click_counts()
+        except Exception as e:
+            print(f"✗ Click flush failed: {e}")
+        finally:
+            await self.redis.close()
 
 
 url_service = URLService()
@@ -1,6 +1,10 @@
 import hashlib
 
 BASE62_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE62_CHARS_B = BASE62_CHARS.encode('ascii')
+
+# Domain separation for short-code hashing
+_HASH_KEY = b"url-shortener:short-code"
 
 def encode_base62(num: int) -> str:
     """Convert integer to base62 string"""
@@ -14,22 +18,23 @@ def encode_base62(num: int) -> str:
 
     return ''.join(reversed(result))
 
+def encode_base62_fixed(num: int, out_len: int) -> str:
+    """Encode the low out_len base62 digits of num, zero-padded on the left"""
+    buf = bytearray(out_len)
+    chars = BASE62_CHARS_B
+    for i in range(out_len - 1, -1, -1):
+        num, r = divmod(num, 62)
+        buf[i] = chars[r]
+    return buf.decode('ascii')
+
 def generate_short_code(url: str, xid: int, length: int = 10) -> str:
     """Generate short code using combination of ID and hash"""
     # Use ID as primary source for uniqueness
     hash_input = f"{xid}{url}".encode()
-    hash_digest = hashlib.sha256(hash_input).hexdigest()
-
-    # Convert first 16 hex characters to integer
-    hash_num = int(hash_digest[:16], 16)
-
-    # Encode the hash as base62
-    encoded = encode_base62(hash_num)
 
-    # If shorter than desired length, pad with encoded ID
-    while len(encoded) < length:
-        id_encoded = encode_base62(xid)
-        encoded = encoded + id_encoded
+    # 64-bit keyed BLAKE2b digest, read directly as an integer
+    hash_digest = hashlib.blake2b(hash_input, digest_size=8, key=_HASH_KEY).digest()
+    hash_num = int.from_bytes(hash_digest, 'big')
 
-    # Truncate to exact length
-    return encoded[:length]
+    # Emit exactly `length` base62 digits from the hash
+    return encode_base62_fixed(hash_num, length)